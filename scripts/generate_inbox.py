@@ -1,9 +1,12 @@
 import os
-import csv
 import random
+import binascii
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Optional
 from datetime import date, datetime, timedelta
-from uuid import uuid4
 
 # -----------------------------
 # Config
@@ -23,47 +26,103 @@ class Config:
     broken_ref_rate: float = 0.01           # % de refs quebradas
     late_arrival_rate: float = 0.08         # % de eventos com date backdated (chega hoje, data do evento no passado)
     seed: int = 42
+    workers: Optional[int] = None           # processos pra gerar os dias em paralelo (None = os.cpu_count())
+    merchants_changes_only: bool = False    # merchants só com linhas que mudaram desde o arquivo anterior (em vez de snapshot completo)
 
 MERCH_HEADERS = ["merchant_id","business_name","industry_code","state_code","annual_revenue","employees_count","risk_score","onboarding_date"]
 APP_HEADERS   = ["application_id","merchant_id","application_date","requested_amount","loan_purpose","application_status","credit_score","processing_time"]
 DISB_HEADERS  = ["disbursement_id","application_id","merchant_id","disbursed_amount","disbursement_date","interest_rate","term_months","repayment_schedule"]
 PAY_HEADERS   = ["payment_id","disbursement_id","merchant_id","payment_date","payment_amount","payment_method","is_scheduled","days_from_due","processing_timestamp"]
 
+# linhas de header já codificadas (uma vez, no import) pro write_csv
+MERCH_HEADER_LINE = (",".join(MERCH_HEADERS) + "\r\n").encode("utf-8")
+APP_HEADER_LINE   = (",".join(APP_HEADERS) + "\r\n").encode("utf-8")
+DISB_HEADER_LINE  = (",".join(DISB_HEADERS) + "\r\n").encode("utf-8")
+PAY_HEADER_LINE   = (",".join(PAY_HEADERS) + "\r\n").encode("utf-8")
+
+WRITE_CHUNK_ROWS = 8192  # linhas por os.write em write_csv
+
 STATES = ["CA","TX","FL","NY","IL","WA","MA","GA","CO","AZ"]
 INDUSTRIES = ["42310","44512","54161","62120","72251","33411","81111","53111"]
 PURPOSES = ["INVENTORY","WORKING_CAPITAL","EXPANSION","EQUIPMENT","PAYROLL"]
 SCHEDULES = ["DAILY","WEEKLY","MONTHLY"]
 PAY_METHODS = ["ACH","CARD","CHECK","WIRE"]
+DAYS_FROM_DUE = [0, 0, 0, -2, -1, 1, 3, 7, 12]
+TERMS = [6, 9, 12, 18]
+# late arrival: até quantos dias antes do batch_date o evento pode ser datado (também limita a tabela de datas do gen_day)
+APP_MAX_LATE_DAYS = 10
+DISB_MAX_LATE_DAYS = 20
+APP_STATUSES = ["PENDING","APPROVED","REJECTED"]
+APP_STATUS_CUM_WEIGHTS = [0.25, 0.80, 1.00]  # pesos 0.25 / 0.55 / 0.20 já acumulados (random.choices não recalcula)
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
-def write_csv(path: str, headers: list[str], rows: list[list], include_header: bool = True):
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
+def write_all(fd: int, data: bytes):
+    # os.write pode gravar parcialmente; repete até esvaziar
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def write_csv(path: str, header_line: bytes, rows: Iterable[list[str]], include_header: bool = True):
+    # campos já vêm como strings simples (sem vírgula/aspas/quebra de linha): dispensa o quoting do módulo csv.
+    # as linhas (mesmo terminador \r\n do csv.writer) são geradas sob demanda, codificadas em blocos de
+    # WRITE_CHUNK_ROWS e gravadas com os.write direto no fd, sem camada de texto nem BufferedWriter
+    lines = (",".join(r) + "\r\n" for r in rows)
+    # O_BINARY (só existe no Windows): sem ele o fd abre em modo texto e o \n do \r\n vira \r\n de novo
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
         if include_header:
-            w.writerow(headers)
-        w.writerows(rows)
+            write_all(fd, header_line)
+        while chunk := "".join(islice(lines, WRITE_CHUNK_ROWS)):
+            write_all(fd, chunk.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+def uuid_batch(n: int) -> list[str]:
+    # gera n UUIDs v4 de uma vez: um único os.urandom + hexlify, formatado por slicing
+    hexs = binascii.hexlify(os.urandom(16 * n)).decode()
+    out = []
+    for i in range(0, 32 * n, 32):
+        h = hexs[i:i + 32]
+        out.append(f"{h[0:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:32]}")
+    return out
+
+def new_uuid() -> str:
+    return uuid_batch(1)[0]
 
 def fmt_date(d: date) -> str:
-    return d.isoformat()
+    # f-string direto evita o overhead de isoformat/strftime (locale, parsing do formato) por linha
+    return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
 
 def fmt_ts(dt: datetime) -> str:
-    return dt.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+def fmt_floats(fmt: str, values: list[float]) -> list[str]:
+    # formata a coluna inteira numa única operação % (loop em C) em vez de um f-string por valor
+    return ((fmt + " ") * len(values) % tuple(values)).split()
 
 def chance(p: float) -> bool:
     return random.random() < p
 
+def chance_mask(p: float, n: int) -> list[bool]:
+    # n sorteios de chance(p) de uma vez, pra aplicar por coluna em vez de um chance() por linha
+    rnd = random.random
+    return [rnd() < p for _ in range(n)]
+
 def clamp(x, lo, hi):
     return max(lo, min(hi, x))
 
 def gen_merchants(cfg: Config):
     merchants = []
+    merch_ids = uuid_batch(cfg.num_merchants)
+    industries = random.choices(INDUSTRIES, k=cfg.num_merchants)
+    states = random.choices(STATES, k=cfg.num_merchants)
     for i in range(cfg.num_merchants):
-        mid = str(uuid4())
+        mid = merch_ids[i]
         name = f"Merchant {i:04d}"
-        industry = random.choice(INDUSTRIES)
-        state = random.choice(STATES)
+        industry = industries[i]
+        state = states[i]
         revenue = round(random.uniform(50_000, 5_000_000), 2)
         employees = random.randint(1, 250)
         risk = round(clamp(random.random(), 0, 1), 2)
@@ -80,9 +139,6 @@ def gen_merchants(cfg: Config):
         })
     return merchants
 
-def sample_merch(merchants):
-    return random.choice(merchants)
-
 def mutate_merchant(m: dict):
     # muda alguma coisa pra gerar SCD2
     m2 = dict(m)
@@ -97,24 +153,223 @@ def mutate_merchant(m: dict):
         m2["annual_revenue"] = f"{rev:.2f}"
     return m2
 
+def gen_day(cfg: Config, day_idx: int, merchant_ids: list[str]):
+    # gera applications/disbursements/payments novos de um dia; não depende de outros dias,
+    # então roda em paralelo (o carry-over entre dias é aplicado depois, no main)
+    # seed string própria por dia (hash sha512, estável): não colide com a de outro dia nem com a de outro cfg.seed
+    random.seed(f"{cfg.seed}:day{day_idx}")
+    rnd = random.random
+    batch_date = cfg.start_date + timedelta(days=day_idx)
+    day_start = datetime(batch_date.year, batch_date.month, batch_date.day)
+    # todas as datas possíveis do dia, por offset em dias (late arrival até -*_MAX_LATE_DAYS, pagamentos até
+    # +7*pays_per_disb): formata cada uma uma vez e as linhas só indexam a tabela, em vez de timedelta + fmt_date por linha
+    max_late = max(APP_MAX_LATE_DAYS, DISB_MAX_LATE_DAYS)
+    date_strs = {off: fmt_date(batch_date + timedelta(days=off)) for off in range(-max_late, 7 * cfg.pays_per_disb + 1)}
+
+    # -----------------------------
+    # Applications
+    # -----------------------------
+    apps_rows = []
+
+    # gera coluna a coluna (um draw por coluna pro dia inteiro) e formata as linhas numa passada só
+    n_apps = cfg.apps_per_day
+    app_ids = uuid_batch(n_apps)
+    app_merch_ids = random.choices(merchant_ids, k=n_apps)
+    # late arrival: application_date pode ser antes do batch_date
+    app_lags = [int(rnd() * (APP_MAX_LATE_DAYS + 1)) if late else int(rnd() * 3)
+                for late in chance_mask(cfg.late_arrival_rate, n_apps)]
+    requesteds = fmt_floats("%.2f", [5_000 + 245_000 * rnd() for _ in range(n_apps)])
+    statuses = random.choices(APP_STATUSES, cum_weights=APP_STATUS_CUM_WEIGHTS, k=n_apps)
+    credits = [300 + int(rnd() * 551) for _ in range(n_apps)]
+    proc_minutes = [int(rnd() * 60) for _ in range(n_apps)]
+    purposes = random.choices(PURPOSES, k=n_apps)
+    app_proc_ts = [fmt_ts(day_start.replace(hour=2, minute=m)) for m in range(60)]
+    new_apps = [
+        [
+            app_id,
+            merch_id,
+            date_strs[-lag],
+            requested,
+            purpose,
+            status,
+            str(credit),
+            app_proc_ts[minute]
+        ]
+        for app_id, merch_id, lag, requested, purpose, status, credit, minute
+        in zip(app_ids, app_merch_ids, app_lags, requesteds, purposes, statuses, credits, proc_minutes)
+    ]
+    approved_apps = []  # APPROVED do dia, coletadas na mesma passada (inclui duplicatas, como no arquivo)
+    for row, dup in zip(new_apps, chance_mask(cfg.duplicate_rate, n_apps)):
+        apps_rows.append(row)
+        approved = row[5] == "APPROVED"
+        if approved:
+            approved_apps.append(row)
+
+        # duplicata dentro do arquivo
+        if dup:
+            apps_rows.append(row)
+            if approved:
+                approved_apps.append(row)
+
+    # inválido em applications
+    if chance(cfg.invalid_rate):
+        apps_rows.append(["bad-app","", "not-a-date","-5","OTHER","UNKNOWN","999","not-a-ts"])
+
+    # -----------------------------
+    # Disbursements
+    # -----------------------------
+    disb_rows = []
+    # (linha, offset em dias de disbursement_date em relação ao batch_date) de cada disbursement válido
+    # (inclui duplicatas) — é daqui que saem os pagamentos
+    paid_disbs = []
+
+    # Pega algumas apps APPROVED novas do dia (incluindo as duplicatas dentro do arquivo); a aplicação reenviada
+    # pelo carry-over entra depois, no main, e não vira disbursement
+    num_disb = int(len(approved_apps) * cfg.disb_rate)
+    disb_apps = random.sample(approved_apps, num_disb)
+    disb_ids = uuid_batch(num_disb)
+    # late arrival: disbursement_date pode ser antes do batch_date
+    disb_lags = [1 + int(rnd() * DISB_MAX_LATE_DAYS) if late else int(rnd() * 3)
+                 for late in chance_mask(cfg.late_arrival_rate, num_disb)]
+    # use requested_amount como base
+    disb_amounts = fmt_floats("%.2f", [float(r[3]) * (0.85 + 0.15 * rnd()) for r in disb_apps])
+    rates = fmt_floats("%.4f", [0.08 + 0.17 * rnd() for _ in range(num_disb)])
+    terms = random.choices(TERMS, k=num_disb)
+    schedules = random.choices(SCHEDULES, k=num_disb)
+    new_disbs = [
+        [
+            disb_id,
+            app_row[0],
+            app_row[1],
+            amount,
+            date_strs[-lag],
+            rate,
+            str(term),
+            schedule
+        ]
+        for disb_id, app_row, lag, amount, rate, term, schedule
+        in zip(disb_ids, disb_apps, disb_lags, disb_amounts, rates, terms, schedules)
+    ]
+    # referência quebrada de propósito em poucos casos (app inexistente)
+    for row, broken in zip(new_disbs, chance_mask(cfg.broken_ref_rate, num_disb)):
+        if broken:
+            row[1] = new_uuid()
+    for row, lag, dup in zip(new_disbs, disb_lags, chance_mask(cfg.duplicate_rate, num_disb)):
+        disb_rows.append(row)
+        paid_disbs.append((row, -lag))
+
+        # duplicata dentro do arquivo
+        if dup:
+            disb_rows.append(row)
+            paid_disbs.append((row, -lag))
+
+    # inválido em disbursements
+    if chance(cfg.invalid_rate):
+        disb_rows.append(["bad-disb", new_uuid(), new_uuid(), "0", "not-a-date", "-0.1", "0", "YEARLY"])
+
+    # -----------------------------
+    # Payments
+    # -----------------------------
+    pay_rows = []
+
+    # pagamentos para alguns disbursements: N pagamentos por disbursement, gerados coluna a coluna.
+    # só os disbursements válidos (paid_disbs; a linha inválida não tem data pra derivar pagamentos)
+    pays_per = cfg.pays_per_disb
+    n_pays = len(paid_disbs) * pays_per
+    pay_ids = uuid_batch(n_pays)
+    # colunas herdadas do disbursement, repetidas pays_per vezes
+    pay_parents = [r for r, _ in paid_disbs for _ in range(pays_per)]
+    pay_base_offsets = [o for _, o in paid_disbs for _ in range(pays_per)]
+    pay_base_amounts = [float(r[3]) / pays_per for r, _ in paid_disbs for _ in range(pays_per)]
+    pay_weeks = list(range(1, pays_per + 1)) * len(paid_disbs)  # semanal como exemplo
+    pay_amounts = fmt_floats("%.2f", [max(1.0, base * (0.9 + 0.2 * rnd())) for base in pay_base_amounts])
+    methods = random.choices(PAY_METHODS, k=n_pays)
+    is_scheds = random.choices(["TRUE","FALSE"], k=n_pays)
+    # days_from_due: mistura de on-time, early, late e alguns bem atrasados (30-60 = "default proxy")
+    days_from_due = [30 + int(rnd() * 31) if late else d
+                     for late, d in zip(chance_mask(0.03, n_pays), random.choices(DAYS_FROM_DUE, k=n_pays))]
+    proc_minutes = [int(rnd() * 60) for _ in range(n_pays)]
+    pay_proc_ts = [fmt_ts(day_start.replace(hour=9, minute=m)) for m in range(60)]
+    new_pays = [
+        [
+            pid,
+            parent[0],
+            parent[2],
+            date_strs[base_offset + week * 7],
+            amount,
+            method,
+            is_sched,
+            str(dfd),
+            pay_proc_ts[minute]
+        ]
+        for pid, parent, base_offset, week, amount, method, is_sched, dfd, minute
+        in zip(pay_ids, pay_parents, pay_base_offsets, pay_weeks, pay_amounts,
+               methods, is_scheds, days_from_due, proc_minutes)
+    ]
+    # referência quebrada de propósito
+    for row, broken in zip(new_pays, chance_mask(cfg.broken_ref_rate, n_pays)):
+        if broken:
+            row[1] = new_uuid()
+    for row, dup in zip(new_pays, chance_mask(cfg.duplicate_rate, n_pays)):
+        pay_rows.append(row)
+
+        # duplicata dentro do arquivo
+        if dup:
+            pay_rows.append(row)
+
+    # inválido em payments
+    if chance(cfg.invalid_rate):
+        pay_rows.append(["bad-pay", new_uuid(), "", "not-a-date", "-1", "CASH", "MAYBE", "x", "not-a-ts"])
+
+    return apps_rows, new_apps, disb_rows, pay_rows, new_pays
+
+def iter_days(cfg: Config, merchant_ids: list[str]):
+    # devolve o resultado de gen_day dia a dia, em ordem. com 1 worker roda no próprio processo (sem pickle);
+    # com mais, mantém no máximo 2*workers dias em andamento, pra memória não crescer com o dataset inteiro
+    workers = cfg.workers or os.cpu_count() or 1
+    if workers == 1:
+        for day_idx in range(cfg.num_days):
+            # gen_day re-seeda o random global: preserva o estado do processo principal (merchants/carry-over)
+            state = random.getstate()
+            day = gen_day(cfg, day_idx, merchant_ids)
+            random.setstate(state)
+            yield day
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        day_idxs = iter(range(cfg.num_days))
+        pending = deque(ex.submit(gen_day, cfg, d, merchant_ids) for d in islice(day_idxs, 2 * workers))
+        while pending:
+            day = pending.popleft().result()
+            for d in islice(day_idxs, 1):
+                pending.append(ex.submit(gen_day, cfg, d, merchant_ids))
+            yield day
+
 def main(cfg: Config):
     random.seed(cfg.seed)
     ensure_dir(cfg.output_dir)
+    out = os.path.join(cfg.output_dir, "")  # prefixo com separador, resolvido uma vez só
 
     # Base merchants pool
     merchants = gen_merchants(cfg)
-    merchant_by_id = {m["merchant_id"]: m for m in merchants}
+    merchant_ids = [m["merchant_id"] for m in merchants]
 
     # Carry-over maps to create duplicates/updates across days
     carry_apps = {}    # application_id -> row
     carry_pays = {}    # payment_id -> row
+    # chaves em ordem de inserção, pra sortear um id antigo em O(1) sem materializar o dict
+    carry_app_ids = []
+    carry_pay_ids = []
 
-    all_app_ids = []
-    all_disb_ids = []
+    # última linha emitida por merchant_id (só usado com merchants_changes_only)
+    prev_merch_rows = {}
 
-    for day_idx in range(cfg.num_days):
+    # os dias podem ser gerados em paralelo (seed própria por dia, ver iter_days); merchants e carry-over ficam aqui,
+    # em ordem, porque dependem do estado dos dias anteriores
+    for day_idx, (apps_rows, new_apps, disb_rows, pay_rows, new_pays) in enumerate(iter_days(cfg, merchant_ids)):
         batch_date = cfg.start_date + timedelta(days=day_idx)
         bd = fmt_date(batch_date)
+        day_start = datetime(batch_date.year, batch_date.month, batch_date.day)
 
         include_header_merch = not (cfg.no_header_every_n_days and (day_idx % cfg.no_header_every_n_days == 1))
         include_header_disb  = not (cfg.no_header_every_n_days and (day_idx % cfg.no_header_every_n_days == 2))
@@ -124,15 +379,20 @@ def main(cfg: Config):
         # -----------------------------
         merch_rows = []
         # snapshot do dia: todos merchants, mas com algumas mutações pra simular updates
-        for m in merchants:
+        for m, mutate in zip(merchants, chance_mask(0.08, len(merchants))):  # ~8% mudam por dia
             row = m
-            if chance(0.08):  # ~8% mudam por dia
+            if mutate:
                 row = mutate_merchant(m)
-                merchant_by_id[m["merchant_id"]] = row
-            merch_rows.append([
+            merch_row = [
                 row["merchant_id"], row["business_name"], row["industry_code"], row["state_code"],
                 row["annual_revenue"], row["employees_count"], row["risk_score"], row["onboarding_date"]
-            ])
+            ]
+            if cfg.merchants_changes_only:
+                # só o que mudou desde o último arquivo; o batch_date do nome do arquivo é a data efetiva (SCD2)
+                if prev_merch_rows.get(merch_row[0]) == merch_row:
+                    continue
+                prev_merch_rows[merch_row[0]] = merch_row
+            merch_rows.append(merch_row)
 
         # duplicatas e inválidos em merchants
         if merch_rows and chance(cfg.duplicate_rate):
@@ -140,167 +400,48 @@ def main(cfg: Config):
         if chance(cfg.invalid_rate):
             merch_rows.append(["not-a-uuid","Bad Merchant","ABCDE","C","-1","x","1.50","not-a-date"])
 
-        write_csv(os.path.join(cfg.output_dir, f"merchants_{bd}.csv"), MERCH_HEADERS, merch_rows, include_header=include_header_merch)
+        write_csv(out + f"merchants_{bd}.csv", MERCH_HEADER_LINE, merch_rows, include_header=include_header_merch)
 
         # -----------------------------
         # Applications file
         # -----------------------------
-        apps_rows = []
-
         # às vezes reenvia/atualiza uma aplicação antiga (duplicate across days)
         if carry_apps and chance(0.25):
-            old_id, old_row = random.choice(list(carry_apps.items()))
+            old_id = carry_app_ids[random.randrange(len(carry_app_ids))]
+            old_row = carry_apps[old_id]
             # atualiza status/processing_time
             updated = old_row.copy()
             updated[5] = "APPROVED" if updated[5] == "PENDING" else updated[5]
-            updated[7] = fmt_ts(datetime.combine(batch_date, datetime.min.time()) + timedelta(hours=2, minutes=random.randint(0, 59)))
-            apps_rows.append(updated)
-
-        for _ in range(cfg.apps_per_day):
-            app_id = str(uuid4())
-            m = sample_merch(list(merchant_by_id.values()))
-            # late arrival: application_date pode ser antes do batch_date
-            app_date = batch_date - timedelta(days=random.randint(0, 10) if chance(cfg.late_arrival_rate) else random.randint(0, 2))
-            requested = round(random.uniform(5_000, 250_000), 2)
-            status = random.choices(["PENDING","APPROVED","REJECTED"], weights=[0.25, 0.55, 0.20], k=1)[0]
-            credit = random.randint(300, 850)
-            proc_ts = datetime.combine(batch_date, datetime.min.time()) + timedelta(hours=2, minutes=random.randint(0, 59))
-            row = [
-                app_id,
-                m["merchant_id"],
-                fmt_date(app_date),
-                f"{requested:.2f}",
-                random.choice(PURPOSES),
-                status,
-                str(credit),
-                fmt_ts(proc_ts)
-            ]
-            apps_rows.append(row)
-            carry_apps[app_id] = row
-            all_app_ids.append(app_id)
+            updated[7] = fmt_ts(day_start.replace(hour=2, minute=random.randint(0, 59)))
+            apps_rows.insert(0, updated)
+        for row in new_apps:
+            carry_apps[row[0]] = row
+            carry_app_ids.append(row[0])
 
-            # duplicata dentro do arquivo
-            if chance(cfg.duplicate_rate):
-                apps_rows.append(row)
-
-        # inválido em applications
-        if chance(cfg.invalid_rate):
-            apps_rows.append(["bad-app","", "not-a-date","-5","OTHER","UNKNOWN","999","not-a-ts"])
-
-        write_csv(os.path.join(cfg.output_dir, f"applications_{bd}.csv"), APP_HEADERS, apps_rows, include_header=True)
+        write_csv(out + f"applications_{bd}.csv", APP_HEADER_LINE, apps_rows, include_header=True)
 
         # -----------------------------
         # Disbursements file
         # -----------------------------
-        disb_rows = []
-
-        # Pega algumas apps APPROVED do dia (e de dias anteriores, já que pode ter late-arrival)
-        approved_apps = [r for r in apps_rows if len(r) >= 6 and r[5] == "APPROVED"]
-        random.shuffle(approved_apps)
-
-        num_disb = int(len(approved_apps) * cfg.disb_rate)
-        for i in range(num_disb):
-            app_row = approved_apps[i]
-            app_id = app_row[0]
-            merch_id = app_row[1]
-
-            disb_id = str(uuid4())
-            # late arrival: disbursement_date pode ser antes do batch_date
-            disb_date = batch_date - timedelta(days=random.randint(1, 20) if chance(cfg.late_arrival_rate) else random.randint(0, 2))
-            amount = float(app_row[3])  # use requested_amount como base
-            amount = round(amount * random.uniform(0.85, 1.0), 2)
-
-            # referência quebrada de propósito em poucos casos
-            if chance(cfg.broken_ref_rate):
-                app_id_used = str(uuid4())  # app inexistente
-            else:
-                app_id_used = app_id
-
-            row = [
-                disb_id,
-                app_id_used,
-                merch_id,
-                f"{amount:.2f}",
-                fmt_date(disb_date),
-                f"{random.uniform(0.08, 0.25):.4f}",
-                str(random.choice([6, 9, 12, 18])),
-                random.choice(SCHEDULES)
-            ]
-            disb_rows.append(row)
-            all_disb_ids.append(disb_id)
-
-            # duplicata dentro do arquivo
-            if chance(cfg.duplicate_rate):
-                disb_rows.append(row)
-
-        # inválido em disbursements
-        if chance(cfg.invalid_rate):
-            disb_rows.append(["bad-disb", str(uuid4()), str(uuid4()), "0", "not-a-date", "-0.1", "0", "YEARLY"])
-
-        write_csv(os.path.join(cfg.output_dir, f"disbursements_{bd}.csv"), DISB_HEADERS, disb_rows, include_header=include_header_disb)
+        write_csv(out + f"disbursements_{bd}.csv", DISB_HEADER_LINE, disb_rows, include_header=include_header_disb)
 
         # -----------------------------
         # Payments file
         # -----------------------------
-        pay_rows = []
-
         # às vezes reenvia/atualiza um payment antigo (duplicate across days)
         if carry_pays and chance(0.25):
-            old_pid, old_row = random.choice(list(carry_pays.items()))
+            old_pid = carry_pay_ids[random.randrange(len(carry_pay_ids))]
+            old_row = carry_pays[old_pid]
             updated = old_row.copy()
             # muda amount e processing_timestamp pra ser "mais recente"
             updated[4] = f"{max(1.0, float(updated[4]) * random.uniform(0.95, 1.05)):.2f}"
-            updated[8] = fmt_ts(datetime.combine(batch_date, datetime.min.time()) + timedelta(hours=10, minutes=random.randint(0, 59)))
-            pay_rows.append(updated)
-
-        # pagamentos para alguns disbursements
-        for disb_row in disb_rows:
-            disb_id = disb_row[0]
-            merch_id = disb_row[2]
-            disb_date = date.fromisoformat(disb_row[4])
-
-            # gera N pagamentos por disbursement
-            for k in range(cfg.pays_per_disb):
-                pid = str(uuid4())
-                pay_date = disb_date + timedelta(days=(k+1)*7)  # semanal como exemplo
-                amount = round(float(disb_row[3]) / cfg.pays_per_disb * random.uniform(0.9, 1.1), 2)
-                method = random.choice(PAY_METHODS)
-                is_sched = random.choice(["TRUE","FALSE"])
-
-                # days_from_due: mistura de on-time, early, late e alguns bem atrasados (para proxy de default)
-                if chance(0.03):
-                    days_from_due = random.randint(30, 60)  # "default proxy"
-                else:
-                    days_from_due = random.choice([0, 0, 0, -2, -1, 1, 3, 7, 12])
-
-                proc_ts = datetime.combine(batch_date, datetime.min.time()) + timedelta(hours=9, minutes=random.randint(0, 59))
-
-                # referência quebrada de propósito
-                disb_id_used = disb_id if not chance(cfg.broken_ref_rate) else str(uuid4())
-
-                row = [
-                    pid,
-                    disb_id_used,
-                    merch_id,
-                    fmt_date(pay_date),
-                    f"{max(1.0, amount):.2f}",
-                    method,
-                    is_sched,
-                    str(days_from_due),
-                    fmt_ts(proc_ts)
-                ]
-                pay_rows.append(row)
-                carry_pays[pid] = row
-
-                # duplicata dentro do arquivo
-                if chance(cfg.duplicate_rate):
-                    pay_rows.append(row)
-
-        # inválido em payments
-        if chance(cfg.invalid_rate):
-            pay_rows.append(["bad-pay", str(uuid4()), "", "not-a-date", "-1", "CASH", "MAYBE", "x", "not-a-ts"])
+            updated[8] = fmt_ts(day_start.replace(hour=10, minute=random.randint(0, 59)))
+            pay_rows.insert(0, updated)
+        for row in new_pays:
+            carry_pays[row[0]] = row
+            carry_pay_ids.append(row[0])
 
-        write_csv(os.path.join(cfg.output_dir, f"payments_{bd}.csv"), PAY_HEADERS, pay_rows, include_header=True)
+        write_csv(out + f"payments_{bd}.csv", PAY_HEADER_LINE, pay_rows, include_header=True)
 
     print(f"✅ Gerado {cfg.num_days} dias de arquivos em: {os.path.abspath(cfg.output_dir)}")
     print("Exemplos:")